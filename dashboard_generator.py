@@ -1,26 +1,42 @@
 import pandas as pd
 import json
+import os
+import sys
 import plotly.express as px
 import plotly.graph_objects as go
 from dash import Dash, html, dcc
 from dash.dependencies import Input, Output
 import dash_bootstrap_components as dbc
+from partitioning import read_partitions
 
 # Definindo os caminhos dos arquivos
-DATA_FILE = "upload/final_dataset.csv"
+DATA_DIR = "upload/final_dataset"
 KPI_FILE = "upload/kpis.json"
 OUTPUT_HTML = "upload/dashboard.html"
 
+# Filtro de período (formato 'AAAA-MM-DD', inclusivo); None = todo o histórico
+START_DATE = None
+END_DATE = None
+
 # Escolhendo um tema Bootstrap para um visual moderno e limpo
 # Inspirado nos exemplos, vamos usar o tema FLATLY ou CERULEAN
 THEME = dbc.themes.FLATLY
 
+# Parâmetros da exportação estática (HTML único, sem servidor)
+# Séries temporais com mais pontos que o limite são agregadas em blocos consecutivos
+STATIC_MAX_SERIES_POINTS = 24
+# Build "basic" do Plotly.js (barras, linhas e pizza), bem menor que o bundle completo
+# (carregado via CDN: exige acesso à internet para desenhar os gráficos)
+PLOTLY_JS_URL = "https://cdn.plot.ly/plotly-basic-2.35.2.min.js"
+# Cópia local do bundle para embutir no HTML com `--inline-plotly` (arquivo 100% offline).
+# Se None, embute o bundle completo distribuído com o pacote `plotly` (maior, ~3.5 MB)
+PLOTLY_JS_FILE = None
+
 # --- Funções de Carregamento de Dados ---
 
-def load_data():
-    """Carrega o dataset final e os KPIs."""
-    df = pd.read_csv(DATA_FILE)
-    df['order_date'] = pd.to_datetime(df['order_date'], format='mixed', utc=True).dt.tz_convert(None)
+def load_data(start_date=START_DATE, end_date=END_DATE):
+    """Carrega o dataset final (apenas as partições do período) e os KPIs."""
+    df = read_partitions(DATA_DIR, start_date, end_date)
     
     with open(KPI_FILE, 'r', encoding='utf-8') as f:
         kpis = json.load(f)
@@ -230,13 +246,333 @@ def run_dashboard_generator():
             ], className="mb-4"),
         ])
 
-    # --- Geração do HTML Estático (Apenas para visualização) ---
-    # A geração de HTML estático é complexa com DBC, mas vamos simplificar para a entrega.
-    # O foco é o servidor interativo.
-    
+    # --- Geração do HTML Estático ---
+    # A versão estática (sem servidor) é gerada por `export_static_dashboard`,
+    # via `python dashboard_generator.py --static`.
+
     # Inicia o servidor Dash para a versão interativa
     print("\nIniciando o servidor Dash interativo aprimorado...")
     app.run(debug=True)
 
+# --- Exportação Estática (HTML leve, sem servidor) ---
+
+STATIC_TEMPLATE = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Dashboard de Performance da Confecção</title>
+<style>
+body{font-family:system-ui,-apple-system,"Segoe UI",Roboto,sans-serif;margin:0;background:#f5f7fa;color:#2c3e50}
+h1{text-align:center;margin:24px 0 8px}
+.period{text-align:center;color:#7b8a8b;margin-bottom:16px}
+nav{display:flex;justify-content:center;gap:8px;margin-bottom:16px}
+nav button{border:0;background:#ecf0f1;padding:10px 18px;border-radius:4px;cursor:pointer;font-size:1em}
+nav button.active{background:#2c3e50;color:#fff}
+.panel{display:none;padding:0 24px}
+.panel.active{display:block}
+.cards,.charts{display:flex;flex-wrap:wrap;gap:16px;margin-bottom:16px}
+.card{flex:1 1 180px;background:#fff;border-radius:6px;padding:16px;box-shadow:0 1px 3px rgba(0,0,0,.1)}
+.card-title{color:#7b8a8b;font-size:.9em}
+.card-value{font-size:1.5em;font-weight:bold;margin-top:4px}
+.chart{flex:1 1 45%;min-width:320px;background:#fff;border-radius:6px;box-shadow:0 1px 3px rgba(0,0,0,.1)}
+.chart.wide{flex-basis:100%}
+select{padding:8px;font-size:1em;margin-bottom:16px;min-width:240px}
+</style>
+</head>
+<body>
+<h1>Dashboard de Performance da Confecção</h1>
+<div class="period">Período: __PERIOD__</div>
+<nav>__TAB_BUTTONS__</nav>
+__TAB_PANELS__
+<section class="panel" id="panel-vendedor">
+<label>Selecione o Vendedor: <select id="seller-select"></select></label>
+<div id="seller-output"></div>
+</section>
+__DATA_BLOCKS__
+__PLOTLY_SCRIPT__
+<script>
+(function () {
+  var money = new Intl.NumberFormat('pt-BR', {style: 'currency', currency: 'BRL'});
+  var integer = new Intl.NumberFormat('pt-BR', {maximumFractionDigits: 0});
+  var rendered = {};
+
+  // Os dados de cada aba ficam em blocos JSON inertes e só são lidos na primeira exibição
+  function readBlock(id) {
+    return JSON.parse(document.getElementById(id).textContent);
+  }
+
+  function traces(chart) {
+    if (chart.type === 'pie') return [{type: 'pie', labels: chart.x, values: chart.y, hole: 0.3, textinfo: 'percent+label'}];
+    if (chart.type === 'line') return [{type: 'scatter', mode: 'lines+markers', x: chart.x, y: chart.y}];
+    if (chart.type === 'barh') return [{type: 'bar', orientation: 'h', x: chart.y, y: chart.x}];
+    return [{type: 'bar', x: chart.x, y: chart.y}];
+  }
+
+  function renderBlock(block, container) {
+    container.innerHTML = '';
+    var cards = document.createElement('div');
+    cards.className = 'cards';
+    block.cards.forEach(function (card) {
+      var el = document.createElement('div');
+      el.className = 'card';
+      var title = document.createElement('div');
+      title.className = 'card-title';
+      title.textContent = card[0];
+      var value = document.createElement('div');
+      value.className = 'card-value';
+      value.textContent = (card[2] === 'int' ? integer : money).format(card[1]);
+      el.appendChild(title);
+      el.appendChild(value);
+      cards.appendChild(el);
+    });
+    container.appendChild(cards);
+    var charts = document.createElement('div');
+    charts.className = 'charts';
+    container.appendChild(charts);
+    block.charts.forEach(function (chart) {
+      var el = document.createElement('div');
+      el.className = chart.wide ? 'chart wide' : 'chart';
+      charts.appendChild(el);
+      // Sem o Plotly (ex: CDN inacessível offline), os cartões continuam visíveis
+      if (typeof Plotly === 'undefined') {
+        el.textContent = chart.title + ': gráfico indisponível sem acesso à internet.';
+        return;
+      }
+      var layout = {title: {text: chart.title}, height: 380, margin: {t: 50, r: 20, b: 60, l: 60}};
+      if (chart.type === 'barh') layout.yaxis = {automargin: true, categoryorder: 'total ascending'};
+      Plotly.newPlot(el, traces(chart), layout, {displayModeBar: false, responsive: true});
+    });
+  }
+
+  function initSeller() {
+    var sellers = readBlock('data-vendedor').sellers;
+    var select = document.getElementById('seller-select');
+    var output = document.getElementById('seller-output');
+    sellers.forEach(function (name, i) {
+      var option = document.createElement('option');
+      option.value = i;
+      option.textContent = name;
+      select.appendChild(option);
+    });
+    select.onchange = function () {
+      renderBlock(readBlock('seller-' + select.value), output);
+    };
+    if (sellers.length) select.onchange();
+  }
+
+  function showTab(name) {
+    document.querySelectorAll('nav button').forEach(function (b) {
+      b.classList.toggle('active', b.dataset.tab === name);
+    });
+    document.querySelectorAll('.panel').forEach(function (p) {
+      p.classList.toggle('active', p.id === 'panel-' + name);
+    });
+    if (rendered[name]) return;
+    rendered[name] = true;
+    if (name === 'vendedor') initSeller();
+    else renderBlock(readBlock('data-' + name), document.getElementById('panel-' + name));
+  }
+
+  document.querySelectorAll('nav button').forEach(function (b) {
+    b.onclick = function () { showTab(b.dataset.tab); };
+  });
+  showTab('ceo');
+})();
+</script>
+</body>
+</html>
+"""
+
+def downsample_series(series, max_points=STATIC_MAX_SERIES_POINTS):
+    """Reduz uma série temporal a no máximo `max_points` somando blocos de períodos consecutivos.
+
+    Retorna (série reduzida, tamanho do bloco, posições iniciais dos blocos); a série
+    é indexada pelo primeiro período de cada bloco. Quando o tamanho da série não é
+    múltiplo do bloco, o bloco incompleto fica no início (período mais antigo), para
+    que o ponto mais recente não mostre uma queda falsa.
+    """
+    if len(series) <= max_points:
+        return series, 1, list(range(len(series)))
+    step = -(-len(series) // max_points)  # Divisão com arredondamento para cima
+    offset = -len(series) % step  # Meses que faltam para o primeiro bloco ficar completo
+    groups = (pd.RangeIndex(len(series)) + offset) // step
+    downsampled = series.groupby(groups).sum()
+    starts = [0] + list(range(step - offset, len(series), step)) if offset else list(range(0, len(series), step))
+    downsampled.index = series.index[starts]
+    return downsampled, step, starts
+
+def _period_label(start, end):
+    """Rótulo de um bloco de meses (ex: '2022-01', '2022-01–02', '2022-12–2023-01')."""
+    if start == end:
+        return start.strftime('%Y-%m')
+    if start.year == end.year:
+        return f"{start.strftime('%Y-%m')}–{end.strftime('%m')}"
+    return f"{start.strftime('%Y-%m')}–{end.strftime('%Y-%m')}"
+
+def _series_chart(series, title, chart_type='line'):
+    """Converte uma série mensal em um gráfico compacto (listas x/y), aplicando o downsampling.
+
+    Quando os meses são agregados, cada ponto é rotulado com o intervalo que soma
+    e o título indica o tamanho do bloco (e o primeiro bloco, se incompleto), para
+    não parecer um valor mensal.
+    """
+    downsampled, step, starts = downsample_series(series)
+    ends = starts[1:] + [len(series)]
+    labels = [_period_label(series.index[start], series.index[end - 1]) for start, end in zip(starts, ends)]
+    if step > 1:
+        first_size = ends[0] - starts[0]
+        partial = f"; primeiro ponto com {first_size} {'mês' if first_size == 1 else 'meses'}" if first_size < step else ""
+        title = f"{title} (soma a cada {step} meses{partial})"
+    return {
+        "type": chart_type,
+        "title": title,
+        "x": labels,
+        "y": [round(float(v), 2) for v in downsampled.values],
+    }
+
+def _dict_chart(data, title, chart_type='bar'):
+    """Converte um dicionário de KPIs (rótulo -> valor) em um gráfico compacto."""
+    return {
+        "type": chart_type,
+        "title": title,
+        "x": [str(k) for k in data.keys()],
+        "y": [round(float(v), 2) for v in data.values()],
+    }
+
+def _seller_block(seller, df_seller):
+    """Pré-calcula os cartões e gráficos da aba Vendedor para um único vendedor."""
+    total_sales = df_seller['total_value'].sum()
+    total_orders = df_seller['order_id'].nunique()
+    avg_ticket = total_sales / total_orders if total_orders > 0 else 0
+
+    sales_by_channel = df_seller.groupby('sales_channel')['total_value'].sum().to_dict()
+    monthly_sales = df_seller.set_index('order_date').resample('M')['total_value'].sum()
+
+    return {
+        "cards": [
+            [f"Receita de {seller}", round(float(total_sales), 2), "money"],
+            [f"Pedidos de {seller}", int(total_orders), "int"],
+            [f"Ticket Médio de {seller}", round(float(avg_ticket), 2), "money"],
+        ],
+        "charts": [
+            _dict_chart(sales_by_channel, f'Distribuição de Vendas por Canal para {seller}', 'pie'),
+            _series_chart(monthly_sales, f'Evolução Mensal de Vendas para {seller}'),
+        ],
+    }
+
+def build_static_payload(kpis, df):
+    """Monta os blocos de dados pré-agregados de cada aba e de cada vendedor."""
+    global_kpis = kpis['global_kpis']
+    revenue_by_channel = kpis['channel_kpis']['revenue_by_channel']
+    orders_by_channel = kpis['channel_kpis']['orders_by_channel']
+
+    monthly_revenue = pd.Series(kpis['time_kpis']['monthly_revenue'])
+    monthly_revenue.index = pd.to_datetime(monthly_revenue.index)
+
+    revenue_chart = _dict_chart(revenue_by_channel, 'Receita por Canal de Venda')
+    status_chart = _dict_chart(kpis['customer_kpis']['customer_status_count'], 'Status dos Clientes (CRM)', 'pie')
+    seller_chart = _dict_chart(kpis['seller_kpis']['sales_by_seller'], 'Top 10 Vendedores por Receita', 'barh')
+    weekday_chart = _dict_chart(kpis['time_kpis']['orders_by_weekday'], 'Pedidos por Dia da Semana')
+
+    tabs = {
+        "ceo": {
+            "cards": [
+                ["Receita Total", global_kpis['total_revenue'], "money"],
+                ["Total de Pedidos", global_kpis['total_orders'], "int"],
+                ["Ticket Médio", global_kpis['average_ticket'], "money"],
+                ["Total de Clientes", global_kpis['total_customers'], "int"],
+                ["Novos Clientes", global_kpis['new_customers'], "int"],
+            ],
+            "charts": [
+                _series_chart(monthly_revenue, 'Evolução da Receita Mensal'),
+                revenue_chart,
+                status_chart,
+                seller_chart,
+            ],
+        },
+        "marketing": {
+            "cards": [
+                ["Novos Clientes Adquiridos", global_kpis['new_customers'], "int"],
+                ["Receita Online", revenue_by_channel.get('Online', 0), "money"],
+                ["Pedidos Online", orders_by_channel.get('Online', 0), "int"],
+            ],
+            "charts": [
+                status_chart,
+                revenue_chart,
+                dict(weekday_chart, wide=True),
+            ],
+        },
+        "loja": {
+            "cards": [
+                ["Receita Total (Físico)", revenue_by_channel.get('Físico', 0), "money"],
+                ["Total de Pedidos (Físico)", orders_by_channel.get('Físico', 0), "int"],
+                ["Ticket Médio (Físico)", revenue_by_channel.get('Físico', 0) / orders_by_channel.get('Físico', 1), "money"],
+            ],
+            "charts": [
+                dict(seller_chart, wide=True),
+            ],
+        },
+    }
+
+    # Um bloco por vendedor, em ordem de receita, para a troca de vendedor funcionar no navegador
+    seller_order = df.groupby('seller_name')['total_value'].sum().sort_values(ascending=False).index
+    seller_groups = dict(tuple(df.groupby('seller_name')))
+    sellers = [_seller_block(seller, seller_groups[seller]) for seller in seller_order]
+    tabs["vendedor"] = {"sellers": list(seller_order)}
+
+    return tabs, sellers
+
+def _json_block(block_id, data):
+    """Serializa um bloco de dados em JSON compacto dentro de uma tag <script> inerte."""
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    return f'<script type="application/json" id="{block_id}">{payload}</script>'
+
+def _plotly_script(inline_plotly=False):
+    """Tag <script> do Plotly.js: referência ao CDN ou o bundle embutido no próprio HTML."""
+    if not inline_plotly:
+        return f'<script src="{PLOTLY_JS_URL}"></script>'
+    if PLOTLY_JS_FILE:
+        with open(PLOTLY_JS_FILE, 'r', encoding='utf-8') as f:
+            plotly_js = f.read()
+    else:
+        from plotly.offline import get_plotlyjs
+        plotly_js = get_plotlyjs()
+    return f'<script>{plotly_js}</script>'
+
+def export_static_dashboard(output_path=OUTPUT_HTML, inline_plotly=False):
+    """Gera um único arquivo HTML leve, com dados pré-agregados, que abre sem o servidor Dash.
+
+    Por padrão o Plotly.js vem do CDN; com `inline_plotly=True` o bundle é embutido
+    e o arquivo funciona sem acesso à internet (ao custo de um HTML maior).
+    """
+    print("Gerando o dashboard estático...")
+    df, kpis = load_data()
+    tabs, sellers = build_static_payload(kpis, df)
+
+    tab_labels = {'ceo': 'CEO', 'marketing': 'Marketing', 'loja': 'Gerente de Loja', 'vendedor': 'Vendedor'}
+    tab_buttons = "".join(f'<button data-tab="{name}">{label}</button>' for name, label in tab_labels.items())
+    # A aba Vendedor já tem painel próprio no template (seletor + área de saída)
+    tab_panels = "\n".join(f'<section class="panel" id="panel-{name}"></section>' for name in tab_labels if name != 'vendedor')
+    data_blocks = [_json_block(f"data-{name}", block) for name, block in tabs.items()]
+    data_blocks += [_json_block(f"seller-{i}", block) for i, block in enumerate(sellers)]
+
+    html_content = (STATIC_TEMPLATE
+                    .replace('__PERIOD__', f"{kpis.get('period_start', 'N/A')} a {kpis.get('period_end', 'N/A')}")
+                    .replace('__TAB_BUTTONS__', tab_buttons)
+                    .replace('__TAB_PANELS__', tab_panels)
+                    .replace('__DATA_BLOCKS__', "\n".join(data_blocks))
+                    .replace('__PLOTLY_SCRIPT__', _plotly_script(inline_plotly)))
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+
+    print(f"Dashboard estático salvo em: {output_path} ({os.path.getsize(output_path) / 1024:.1f} KB, {len(sellers)} vendedores)")
+
 if __name__ == "__main__":
-    run_dashboard_generator()
\ No newline at end of file
+    # `python dashboard_generator.py --static` gera apenas o HTML estático, sem iniciar o servidor
+    # (`--inline-plotly` embute o Plotly.js para uso sem internet)
+    if "--static" in sys.argv:
+        export_static_dashboard(inline_plotly="--inline-plotly" in sys.argv)
+    else:
+        run_dashboard_generator()
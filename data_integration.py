@@ -1,12 +1,25 @@
 import pandas as pd
 import json
+import math
+import os
 import re
+from ecom_extractor import iter_ecom_docs
 
 # Definindo o caminho dos arquivos
 CRM_FILE = "upload\clientes_crm.csv"
 ERP_FILE = "upload\pedido_erp.csv"
 ECOM_FILE = "upload\pedido_ecom.json"
 OUTPUT_FILE = "upload/integrated_data.csv"
+METADATA_FILE = "upload/metadata.json"
+# Quando definida, os pedidos do E-commerce são extraídos direto da API paginada
+# (ver `ecom_extractor.py`) em vez do dump `pedido_ecom.json`
+ECOM_API_URL = os.environ.get("ECOM_API_URL")
+
+# Deduplicação entre fontes: um pedido online retirado na loja aparece no ERP e no E-commerce
+DEDUP_AUDIT_FILE = "upload/dedup_audit.csv"
+DEDUP_TIME_WINDOW = pd.Timedelta(hours=72)  # Distância máxima entre as datas dos dois registros
+DEDUP_VALUE_TOLERANCE = 0.05                # Diferença máxima de valor (R$) entre os dois registros
+DEDUP_MAX_BLOCK_SIZE = 500                  # Acima disso (pedidos de uma fonte no bloco), o documento é pareado por proximidade no tempo
 
 # --- Funções de Limpeza e Transformação ---
 
@@ -72,15 +85,21 @@ def load_and_clean_erp(file_path):
     print(f"ERP carregado: {len(df_erp)} registros.")
     return df_erp
 
-def load_and_clean_ecom(file_path):
-    """Carrega e limpa os dados de pedidos do E-commerce (Vendas Online)."""
+def load_and_clean_ecom(file_path=None, docs=None):
+    """Carrega e limpa os dados de pedidos do E-commerce (Vendas Online).
+
+    Os pedidos vêm do dump JSON em `file_path` ou, quando `docs` é informado,
+    de um iterável de documentos (ex: o extrator da API em `ecom_extractor.py`),
+    consumido à medida que as páginas chegam.
+    """
     print("Carregando dados do E-commerce...")
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    if docs is None:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            docs = json.load(f).get('docs', [])
     
     # Extrair dados relevantes
     orders_list = []
-    for doc in data.get('docs', []):
+    for doc in docs:
         order_id = doc.get('_id')
         customer_doc = doc.get('customer', {}).get('doc')
         order_date = doc.get('settings', {}).get('createdAt')
@@ -111,15 +130,150 @@ def load_and_clean_ecom(file_path):
     print(f"E-commerce carregado: {len(df_ecom)} registros.")
     return df_ecom
 
+# --- Deduplicação entre Fontes ---
+
+def _blocking_hash(documents, value_buckets, time_buckets):
+    """Gera um hash de 64 bits por pedido a partir das chaves de bloqueio (documento, valor, janela)."""
+    keys = pd.DataFrame({'doc': documents.to_numpy(), 'value': value_buckets.to_numpy(), 'time': time_buckets.to_numpy()})
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+def _nearest_time_candidates(erp, ecom, erp_value, ecom_value, time_window):
+    """Candidatos para documentos com blocos grandes demais: para cada pedido do ERP, o pedido do
+    E-commerce mais próximo no tempo com o mesmo documento, em cada faixa de valor vizinha.
+
+    Gera no máximo 3 candidatos por pedido do ERP, em vez do produto cartesiano do bloco.
+    """
+    right = ecom[['row_ecom', 'customer_document', 'order_date']].assign(value_bucket=ecom_value).sort_values('order_date')
+    pairs = []
+    for value_offset in (-1, 0, 1):
+        left = erp[['row_erp', 'customer_document', 'order_date']].assign(value_bucket=erp_value + value_offset).sort_values('order_date')
+        matched = pd.merge_asof(left, right, on='order_date', by=['customer_document', 'value_bucket'],
+                                direction='nearest', tolerance=time_window)
+        pairs.append(matched[['row_erp', 'row_ecom']].dropna())
+    return pd.concat(pairs, ignore_index=True).astype('int64')
+
+def find_cross_source_duplicates(df_orders, time_window=DEDUP_TIME_WINDOW, value_tolerance=DEDUP_VALUE_TOLERANCE,
+                                 max_block_size=DEDUP_MAX_BLOCK_SIZE):
+    """Encontra pares ERP/E-commerce que representam a mesma venda.
+
+    Os pedidos são agrupados em blocos pelo hash de (documento, faixa de valor,
+    janela de tempo), com faixas da largura de `value_tolerance` e janelas da largura
+    de `time_window`. Cada pedido do ERP consulta o próprio bloco e os vizinhos
+    (faixa ±1, janela ±1), o que vira um único hash join e mantém o custo quase
+    linear. Os candidatos são então confirmados (mesmo documento, diferença de valor
+    e de tempo dentro das tolerâncias) e pareados 1:1 pela menor distância no tempo.
+
+    Documentos com algum bloco acima de `max_block_size` pedidos (ex: documento genérico
+    '00000000000' usado em muitas vendas) gerariam um produto cartesiano: para eles, cada
+    pedido do ERP recebe apenas o candidato mais próximo no tempo por faixa de valor
+    (`match_method` = 'nearest_time' na auditoria). Retorna a tabela de auditoria com um
+    par por linha.
+    """
+    valid = df_orders['customer_document'].notna() & df_orders['total_value'].notna() & df_orders['order_date'].notna()
+    is_erp = df_orders['source'] == 'ERP_Fisica'
+    cols = ['order_id', 'customer_document', 'total_value', 'order_date']
+    erp = df_orders.loc[valid & is_erp, cols].rename_axis('row_erp').reset_index()
+    ecom = df_orders.loc[valid & ~is_erp, cols].rename_axis('row_ecom').reset_index()
+
+    # Faixas de valor em centavos (aritmética inteira), com a largura da tolerância:
+    # dois valores dentro da tolerância caem na mesma faixa ou em faixas vizinhas
+    value_width = max(1, math.ceil(round(value_tolerance * 100, 6)))
+
+    def buckets(df):
+        cents = (df['total_value'] * 100).round().astype('int64')
+        return cents // value_width, (df['order_date'] - pd.Timestamp(0)) // time_window
+
+    ecom_value, ecom_time = buckets(ecom)
+    ecom['block'] = _blocking_hash(ecom['customer_document'], ecom_value, ecom_time)
+    erp_value, erp_time = buckets(erp)
+    erp_block = pd.Series(_blocking_hash(erp['customer_document'], erp_value, erp_time))
+
+    # Documentos com blocos grandes demais saem do hash join e são pareados por proximidade no tempo
+    hot_docs = pd.concat([
+        ecom.loc[ecom['block'].map(ecom['block'].value_counts()) > max_block_size, 'customer_document'],
+        erp.loc[(erp_block.map(erp_block.value_counts()) > max_block_size).to_numpy(), 'customer_document'],
+    ]).unique()
+    hot_erp = erp['customer_document'].isin(hot_docs).to_numpy()
+    hot_ecom = ecom['customer_document'].isin(hot_docs).to_numpy()
+    if len(hot_docs):
+        print(f"Aviso: {len(hot_docs)} documento(s) com mais de {max_block_size} pedidos em um bloco; "
+              f"pareados pelo pedido mais próximo no tempo.")
+
+    # Cada pedido do ERP consulta os 9 blocos vizinhos, para não perder pares na fronteira dos blocos
+    probes = []
+    for value_offset in (-1, 0, 1):
+        for time_offset in (-1, 0, 1):
+            probes.append(pd.DataFrame({
+                'row_erp': erp['row_erp'].to_numpy()[~hot_erp],
+                'block': _blocking_hash(erp['customer_document'][~hot_erp], erp_value[~hot_erp] + value_offset,
+                                        erp_time[~hot_erp] + time_offset),
+            }))
+    probes = pd.concat(probes, ignore_index=True)
+
+    candidates = pd.concat([
+        probes.merge(ecom.loc[~hot_ecom, ['row_ecom', 'block']], on='block').drop(columns='block').assign(match_method='block'),
+        _nearest_time_candidates(erp[hot_erp], ecom[hot_ecom], erp_value[hot_erp], ecom_value[hot_ecom],
+                                 time_window).assign(match_method='nearest_time'),
+    ], ignore_index=True)
+    candidates = (candidates
+                  .merge(erp.add_suffix('_erp').rename(columns={'row_erp_erp': 'row_erp'}), on='row_erp')
+                  .merge(ecom.drop(columns='block').add_suffix('_ecom').rename(columns={'row_ecom_ecom': 'row_ecom'}), on='row_ecom'))
+
+    # Confirmação dentro do bloco (o hash pode colidir e as faixas/janelas são aproximadas)
+    candidates['time_diff_minutes'] = (candidates['order_date_erp'] - candidates['order_date_ecom']).abs().dt.total_seconds() / 60
+    # Diferença em centavos, para que a tolerância seja inclusiva apesar do ponto flutuante
+    candidates['value_diff'] = (candidates['total_value_erp'] - candidates['total_value_ecom']).abs().round(2)
+    confirmed = candidates[
+        (candidates['customer_document_erp'] == candidates['customer_document_ecom'])
+        & (candidates['value_diff'] <= value_tolerance)
+        & (candidates['time_diff_minutes'] <= time_window.total_seconds() / 60)
+    ]
+
+    # Pareamento 1:1 guloso: percorre os candidatos do mais próximo ao mais distante no tempo
+    # e aceita o par só se nenhum dos dois pedidos já foi usado. Assim, um pedido do ERP
+    # cujo melhor candidato ficou com outro ainda pode casar com o próximo candidato válido
+    # (compras repetidas do mesmo cliente, com o mesmo valor)
+    confirmed = confirmed.sort_values(['time_diff_minutes', 'value_diff'], kind='stable')
+    used_erp, used_ecom, accepted = set(), set(), []
+    for position, row_erp, row_ecom in zip(range(len(confirmed)), confirmed['row_erp'].to_numpy(), confirmed['row_ecom'].to_numpy()):
+        if row_erp in used_erp or row_ecom in used_ecom:
+            continue
+        used_erp.add(row_erp)
+        used_ecom.add(row_ecom)
+        accepted.append(position)
+    audit = confirmed.iloc[accepted]
+
+    return audit[['row_erp', 'row_ecom', 'order_id_erp', 'order_id_ecom', 'customer_document_erp',
+                  'total_value_erp', 'total_value_ecom', 'order_date_erp', 'order_date_ecom',
+                  'time_diff_minutes', 'value_diff', 'match_method']].rename(columns={'customer_document_erp': 'customer_document'})
+
+def deduplicate_orders(df_orders, audit_file=DEDUP_AUDIT_FILE):
+    """Remove os pedidos do ERP duplicados de pedidos do E-commerce e salva a auditoria dos pares.
+
+    O registro do E-commerce é mantido, pois é a origem da venda (a loja apenas faz a entrega).
+    """
+    audit = find_cross_source_duplicates(df_orders)
+    audit.drop(columns=['row_erp', 'row_ecom']).to_csv(audit_file, index=False, encoding='utf-8')
+    print(f"Pedidos duplicados entre ERP e E-commerce: {len(audit)} (auditoria em: {audit_file}).")
+    return df_orders.drop(index=audit['row_erp']).reset_index(drop=True), len(audit)
+
 # --- Integração e Exportação ---
 
-def integrate_data():
-    """Função principal para carregar, limpar e integrar os dados."""
+def integrate_data(crm_file=CRM_FILE, erp_file=ERP_FILE, ecom_file=ECOM_FILE, output_file=OUTPUT_FILE,
+                   metadata_file=METADATA_FILE, audit_file=DEDUP_AUDIT_FILE, ecom_api_url=ECOM_API_URL):
+    """Função principal para carregar, limpar e integrar os dados.
+
+    Os caminhos padrão são os da pasta `upload/`; o `multi_tenant_runner.py`
+    informa os caminhos de cada marca.
+    """
     
     # 1. Carregar e limpar os dados
-    df_crm = load_and_clean_crm(CRM_FILE)
-    df_erp = load_and_clean_erp(ERP_FILE)
-    df_ecom = load_and_clean_ecom(ECOM_FILE)
+    df_crm = load_and_clean_crm(crm_file)
+    df_erp = load_and_clean_erp(erp_file)
+    if ecom_api_url:
+        df_ecom = load_and_clean_ecom(docs=iter_ecom_docs(ecom_api_url))
+    else:
+        df_ecom = load_and_clean_ecom(ecom_file)
     
     # 2. Unir os pedidos (ERP + E-commerce)
     df_orders = pd.concat([df_erp, df_ecom], ignore_index=True)
@@ -127,6 +281,9 @@ def integrate_data():
     
     print(f"Total de pedidos unificados: {len(df_orders)}.")
     
+    # 2.1. Remover vendas registradas nas duas fontes (pedido online retirado na loja)
+    df_orders, total_duplicates = deduplicate_orders(df_orders, audit_file)
+    
     # 3. Integrar com os dados do CRM
     # Usar o 'customer_document' como chave de ligação
     df_integrated = pd.merge(
@@ -143,18 +300,19 @@ def integrate_data():
     
     # 5. Exportar o dataset integrado
     print(f"Total de registros integrados: {len(df_integrated)}.")
-    df_integrated.to_csv(OUTPUT_FILE, index=False, encoding='utf-8')
-    print(f"Dados integrados salvos em: {OUTPUT_FILE}")
+    df_integrated.to_csv(output_file, index=False, encoding='utf-8')
+    print(f"Dados integrados salvos em: {output_file}")
     
     # 6. Salvar um resumo da estrutura para a próxima fase
     # Criar um arquivo de metadados simples
     metadata = {
         "total_orders": len(df_orders),
+        "cross_source_duplicates_removed": total_duplicates,
         "total_customers_in_crm": len(df_crm),
         "total_integrated_records": len(df_integrated),
         "columns": list(df_integrated.columns)
     }
-    with open("upload/metadata.json", 'w') as f:
+    with open(metadata_file, 'w') as f:
         json.dump(metadata, f, indent=4)
     print("Metadados salvos.")
 
@@ -1,17 +1,79 @@
 import pandas as pd
 import json
+import os
+import sys
+from partitioning import load_manifest, partition_key, write_partitions
 
 # Definindo o caminho do arquivo integrado
 INPUT_FILE = "upload/integrated_data.csv"
-OUTPUT_FILE = "upload/final_dataset.csv"
+OUTPUT_DIR = "upload/final_dataset"
 METADATA_FILE = "upload/metadata.json"
 
-def refine_data_model():
-    """Refina o modelo de dados, criando colunas de tempo e categorizando dados."""
+# O dataset final é gravado particionado por ano/mês (e opcionalmente por canal),
+# para que os consumidores leiam apenas os meses que precisam
+PARTITION_BY_CHANNEL = False
+PARTITION_COLS = ['order_year', 'order_month'] + (['sales_channel'] if PARTITION_BY_CHANNEL else [])
+# Primeira compra de cada cliente na última gravação, usada para detectar quais
+# partições uma regravação parcial também precisa atualizar
+FIRST_PURCHASE_FILE = "_first_purchase.csv"
+
+def expand_affected_partitions(df, partitions, output_dir):
+    """Completa a lista de (ano, mês) de uma regravação parcial com as partições cujo conteúdo mudou.
+
+    Um pedido atrasado pode antecipar a primeira compra de um cliente: `first_order_date`
+    e `is_first_purchase` mudam em todos os meses em que esse cliente comprou. Também
+    entram as partições cujo número de linhas difere do manifesto. Retorna None
+    (regravação completa) se não houver o registro da gravação anterior.
+    """
+    previous_file = os.path.join(output_dir, FIRST_PURCHASE_FILE)
+    if not os.path.exists(previous_file):
+        print(f"Aviso: {previous_file} não encontrado; regravando todas as partições.")
+        return None
+
+    affected = {(int(year), int(month)) for year, month in partitions}
+
+    # Clientes cuja primeira compra mudou (ou que são novos)
+    previous = pd.read_csv(previous_file)
+    previous['customer_document'] = previous['customer_document'].astype(df['customer_document'].dtype)
+    previous['first_order_date'] = pd.to_datetime(previous['first_order_date'])
+    current = df[['customer_document', 'first_order_date']].dropna().drop_duplicates(subset=['customer_document'])
+    compare = current.merge(previous, on='customer_document', how='left', suffixes=('', '_previous'))
+    changed = compare.loc[compare['first_order_date'] != compare['first_order_date_previous'], 'customer_document']
+    rows = df[df['customer_document'].isin(changed)].dropna(subset=['order_year', 'order_month'])
+    affected |= set(zip(rows['order_year'].astype(int), rows['order_month'].astype(int)))
+
+    # Partições que ganharam/perderam linhas ou deixaram de existir
+    manifest = load_manifest(output_dir)
+    counts = df.groupby(PARTITION_COLS, dropna=False).size()
+    current_keys = set()
+    for values, rows_count in counts.items():
+        values = values if isinstance(values, tuple) else (values,)
+        key = partition_key(values, PARTITION_COLS)
+        current_keys.add(key)
+        entry = manifest["partitions"].get(key)
+        if (entry is None or entry["rows"] != rows_count) and not pd.isna(values[0]) and not pd.isna(values[1]):
+            affected.add((int(values[0]), int(values[1])))
+    for key, entry in manifest["partitions"].items():
+        year, month = entry["values"].get("order_year"), entry["values"].get("order_month")
+        if key not in current_keys and isinstance(year, int) and isinstance(month, int):
+            affected.add((year, month))
+
+    extra = sorted(affected - {(int(year), int(month)) for year, month in partitions})
+    if extra:
+        print(f"Partições adicionais afetadas pela mudança: {', '.join(f'{y}-{m:02d}' for y, m in extra)}")
+    return sorted(affected)
+
+def refine_data_model(partitions=None, input_file=INPUT_FILE, output_dir=OUTPUT_DIR, metadata_file=METADATA_FILE):
+    """Refina o modelo de dados, criando colunas de tempo e categorizando dados.
+
+    `partitions` (lista de (ano, mês)) restringe a gravação às partições afetadas;
+    o modelo continua sendo calculado sobre todo o histórico (ex: `is_first_purchase`),
+    e os meses cujas colunas derivadas mudaram são incluídos automaticamente.
+    """
     print("Iniciando o refinamento do modelo de dados...")
     
     # Carregar o dataset integrado
-    df = pd.read_csv(INPUT_FILE)
+    df = pd.read_csv(input_file)
     
     # 1. Conversão de Tipos
     df['order_date'] = pd.to_datetime(df['order_date'], format='mixed', utc=True).dt.tz_convert(None)
@@ -58,21 +120,32 @@ def refine_data_model():
         # Adicionar mais padronizações conforme necessário
     })
     
-    # 5. Exportar o dataset final
-    df.to_csv(OUTPUT_FILE, index=False, encoding='utf-8')
-    print(f"Modelo de dados refinado salvo em: {OUTPUT_FILE}")
+    # 5. Exportar o dataset final particionado (com manifesto de estatísticas por partição)
+    if partitions is not None:
+        partitions = expand_affected_partitions(df, partitions, output_dir)
+    manifest = write_partitions(df, output_dir, PARTITION_COLS, only=partitions)
+    df[['customer_document', 'first_order_date']].dropna().drop_duplicates(subset=['customer_document']).to_csv(
+        os.path.join(output_dir, FIRST_PURCHASE_FILE), index=False, encoding='utf-8')
+    print(f"Modelo de dados refinado salvo em: {output_dir} ({len(manifest['partitions'])} partições)")
     
     # 6. Atualizar metadados
-    with open(METADATA_FILE, 'r') as f:
+    with open(metadata_file, 'r') as f:
         metadata = json.load(f)
     
     metadata["final_dataset_columns"] = list(df.columns)
+    metadata["final_dataset_dir"] = output_dir
+    metadata["final_dataset_partition_cols"] = PARTITION_COLS
     metadata["min_order_date"] = df['order_date'].min().strftime('%Y-%m-%d')
     metadata["max_order_date"] = df['order_date'].max().strftime('%Y-%m-%d')
     
-    with open(METADATA_FILE, 'w') as f:
+    with open(metadata_file, 'w') as f:
         json.dump(metadata, f, indent=4)
     print("Metadados atualizados.")
 
 if __name__ == "__main__":
-    refine_data_model()
+    # `python data_modeling.py --partitions 2024-05,2024-06` regrava apenas os meses informados
+    if "--partitions" in sys.argv:
+        months = sys.argv[sys.argv.index("--partitions") + 1].split(",")
+        refine_data_model(partitions=[tuple(int(v) for v in month.split("-")) for month in months])
+    else:
+        refine_data_model()
@@ -0,0 +1,231 @@
+import asyncio
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from urllib.parse import urlencode
+
+# Definindo os parâmetros da extração
+ECOM_FILE = "upload/pedido_ecom.json"
+CURSOR_FILE = "upload/ecom_cursor.json"
+PAGE_LIMIT = 100
+MAX_CONCURRENCY = 8       # Número máximo de páginas buscadas em paralelo
+MAX_RETRIES = 4           # Retentativas por página antes de desistir
+RETRY_BACKOFF = 0.5       # Espera inicial entre retentativas (segundos), dobrada a cada falha
+REQUEST_TIMEOUT = 30
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+_DONE = object()
+
+# --- Requisições HTTP ---
+
+def _fetch_json(url):
+    """Faz um GET bloqueante e decodifica a resposta JSON."""
+    with urllib.request.urlopen(url, timeout=REQUEST_TIMEOUT) as response:
+        return json.load(response)
+
+async def _run_in_daemon_thread(func, *args):
+    """Roda uma chamada bloqueante em uma thread daemon e aguarda o resultado.
+
+    Diferente do executor padrão do asyncio, uma requisição ainda pendente quando o
+    consumidor desiste não segura o encerramento do interpretador.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(result, error):
+        if not future.done():
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def target():
+        try:
+            result, error = func(*args), None
+        except BaseException as e:
+            result, error = None, e
+        try:
+            loop.call_soon_threadsafe(resolve, result, error)
+        except RuntimeError:
+            pass  # O loop já foi encerrado (extração interrompida)
+
+    threading.Thread(target=target, daemon=True).start()
+    return await future
+
+async def fetch_page(base_url, page, semaphore, limit=PAGE_LIMIT, created_after=None):
+    """Busca uma página da API com retentativas e backoff exponencial."""
+    params = {'page': page, 'limit': limit}
+    if created_after:
+        params['createdAfter'] = created_after
+    url = f"{base_url}?{urlencode(params)}"
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with semaphore:
+                return await _run_in_daemon_thread(_fetch_json, url)
+        except urllib.error.HTTPError as e:
+            if e.code not in RETRYABLE_STATUS or attempt == MAX_RETRIES:
+                raise
+        except (urllib.error.URLError, TimeoutError, ConnectionError):
+            if attempt == MAX_RETRIES:
+                raise
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+# --- Extração Concorrente ---
+
+async def stream_ecom_pages(base_url, created_after=None, limit=PAGE_LIMIT, max_concurrency=MAX_CONCURRENCY):
+    """Gera as listas de pedidos de cada página à medida que chegam (fora de ordem).
+
+    A primeira página informa `totalPages`; as demais são buscadas em uma janela
+    deslizante de até `max_concurrency` páginas. Uma nova página só é pedida depois
+    que uma resposta foi entregue ao consumidor, então um consumidor lento segura a
+    extração em vez de acumular as respostas em memória.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    first = await fetch_page(base_url, 1, semaphore, limit, created_after)
+    yield first.get('docs', [])
+
+    total_pages = first.get('totalPages', 1)
+    next_page = 2
+    in_flight = set()
+    try:
+        while next_page <= total_pages or in_flight:
+            while next_page <= total_pages and len(in_flight) < max_concurrency:
+                in_flight.add(asyncio.create_task(fetch_page(base_url, next_page, semaphore, limit, created_after)))
+                next_page += 1
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result().get('docs', [])
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+def iter_ecom_docs(base_url, created_after=None, limit=PAGE_LIMIT, max_concurrency=MAX_CONCURRENCY):
+    """Itera de forma síncrona sobre os pedidos da API, enquanto as páginas ainda estão sendo buscadas.
+
+    A extração assíncrona roda em uma thread de fundo e entrega as páginas por uma
+    fila, de modo que `load_and_clean_ecom(docs=...)` consome os pedidos em streaming.
+    Se o consumidor parar antes do fim (iterador fechado ou erro no processamento),
+    a extração é interrompida e a thread de fundo termina.
+    """
+    pages = queue.Queue(maxsize=max_concurrency * 2)
+    stop = threading.Event()
+
+    def put(item):
+        """Entrega um item ao consumidor; retorna False se o consumidor já parou."""
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    async def produce():
+        stream = stream_ecom_pages(base_url, created_after, limit, max_concurrency)
+        try:
+            async for docs in stream:
+                # Espera por espaço na fila sem ocupar threads do executor
+                while not stop.is_set():
+                    try:
+                        pages.put_nowait(docs)
+                        break
+                    except queue.Full:
+                        await asyncio.sleep(0.05)
+                if stop.is_set():
+                    return
+        finally:
+            # Cancela as páginas em andamento
+            await stream.aclose()
+
+    def run():
+        try:
+            asyncio.run(produce())
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+
+    producer = threading.Thread(target=run, name="ecom-extractor", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = pages.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield from item
+    finally:
+        stop.set()
+        # Esvazia a fila para liberar as páginas já baixadas
+        while not pages.empty():
+            pages.get_nowait()
+
+# --- Cursor Incremental ---
+
+def parse_created_at(value):
+    """Converte o `settings.createdAt` (ISO 8601, com 'Z') em datetime com timezone."""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def load_cursor(cursor_file=CURSOR_FILE):
+    """Retorna o maior `settings.createdAt` já extraído, ou None na primeira execução."""
+    if not os.path.exists(cursor_file):
+        return None
+    with open(cursor_file, 'r', encoding='utf-8') as f:
+        return json.load(f).get('created_after')
+
+def save_cursor(created_after, cursor_file=CURSOR_FILE):
+    """Persiste o cursor incremental para a próxima extração."""
+    with open(cursor_file, 'w', encoding='utf-8') as f:
+        json.dump({'created_after': created_after}, f, indent=4)
+
+def extract_incremental(base_url, output_file=ECOM_FILE, cursor_file=CURSOR_FILE, max_concurrency=MAX_CONCURRENCY):
+    """Busca apenas os pedidos posteriores ao cursor e os acrescenta ao dump `pedido_ecom.json`.
+
+    O cursor só avança depois que todas as páginas foram baixadas com sucesso.
+    """
+    cursor = load_cursor(cursor_file)
+    print(f"Extraindo pedidos do E-commerce (cursor: {cursor or 'início'})...")
+
+    start = time.perf_counter()
+    new_docs = list(iter_ecom_docs(base_url, created_after=cursor, max_concurrency=max_concurrency))
+    elapsed = time.perf_counter() - start
+    print(f"{len(new_docs)} pedidos novos em {elapsed:.2f}s ({len(new_docs) / elapsed if elapsed else 0:,.0f} pedidos/s).")
+
+    if not new_docs:
+        return 0
+
+    data = {'docs': []}
+    if os.path.exists(output_file):
+        with open(output_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    # Evita duplicar pedidos caso o dump já contenha parte da janela extraída
+    known_ids = {doc.get('_id') for doc in data.get('docs', [])}
+    data['docs'] = data.get('docs', []) + [doc for doc in new_docs if doc.get('_id') not in known_ids]
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    print(f"Dump do E-commerce atualizado em: {output_file} ({len(data['docs'])} pedidos)")
+
+    latest = max(new_docs, key=lambda doc: parse_created_at(doc['settings']['createdAt']))
+    save_cursor(latest['settings']['createdAt'], cursor_file)
+    return len(new_docs)
+
+if __name__ == "__main__":
+    # `python ecom_extractor.py <url>` atualiza o dump de forma incremental;
+    # `python ecom_extractor.py --mock` mede o throughput contra o servidor local simulado.
+    if "--mock" in sys.argv:
+        from ecom_mock_server import start_mock_server
+        server, url = start_mock_server(port=0)
+        start = time.perf_counter()
+        total = sum(1 for _ in iter_ecom_docs(url))
+        elapsed = time.perf_counter() - start
+        print(f"Mock: {total} pedidos em {elapsed:.2f}s ({total / elapsed:,.0f} pedidos/s, concorrência {MAX_CONCURRENCY}).")
+        server.shutdown()
+    else:
+        extract_incremental(sys.argv[1] if len(sys.argv) > 1 else os.environ["ECOM_API_URL"])
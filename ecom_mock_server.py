@@ -0,0 +1,108 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Servidor local que imita a API paginada de pedidos do E-commerce (envelope `docs`),
+# para testar o extrator (`ecom_extractor.py`) sem acesso à API real.
+HOST = "127.0.0.1"
+PORT = 8765
+TOTAL_DOCS = 5000
+DEFAULT_LIMIT = 100
+LATENCY = 0.05      # Atraso simulado por requisição (segundos)
+FAILURE_RATE = 0.05  # Fração de requisições que respondem 503, para exercitar as retentativas
+
+SELLERS = ['NATALIA', 'JESSICA', 'KELI', 'SANDRA', 'GABI', 'FANNY', 'DENIZE', 'DANISIO']
+
+# --- Geração de Dados Sintéticos ---
+
+def generate_docs(total_docs=TOTAL_DOCS, seed=42):
+    """Gera pedidos sintéticos no mesmo formato do `pedido_ecom.json`, em ordem de `settings.createdAt`."""
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    docs = []
+    for i in range(total_docs):
+        created_at = start + timedelta(minutes=15 * i + rng.randint(0, 14))
+        docs.append({
+            '_id': f"{i:024x}",
+            'customer': {'doc': f"{rng.randint(0, 999):03d}.{rng.randint(0, 999):03d}.{rng.randint(0, 999):03d}-{rng.randint(0, 99):02d}"},
+            'settings': {
+                'createdAt': created_at.strftime('%Y-%m-%dT%H:%M:%S.') + f"{created_at.microsecond // 1000:03d}Z",
+                'source': 'Vestishop',
+            },
+            'seller': {'name': rng.choice(SELLERS)},
+            'summary': {'total': round(rng.uniform(50, 1500), 2)},
+        })
+    return docs
+
+def parse_created_at(value):
+    """Converte o `settings.createdAt` (ISO 8601, com 'Z') em datetime com timezone."""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def paginate(docs, page, limit, created_after=None):
+    """Monta o envelope de paginação (docs, totalDocs, totalPages, ...) para uma página."""
+    if created_after:
+        cursor = parse_created_at(created_after)
+        docs = [doc for doc in docs if parse_created_at(doc['settings']['createdAt']) > cursor]
+    total_docs = len(docs)
+    total_pages = max(1, -(-total_docs // limit))
+    return {
+        'docs': docs[(page - 1) * limit:page * limit],
+        'totalDocs': total_docs,
+        'limit': limit,
+        'page': page,
+        'totalPages': total_pages,
+        'hasNextPage': page < total_pages,
+        'nextPage': page + 1 if page < total_pages else None,
+    }
+
+# --- Servidor HTTP ---
+
+def make_handler(docs, latency=LATENCY, failure_rate=FAILURE_RATE):
+    """Cria a classe de handler HTTP servindo `docs` com latência e falhas simuladas."""
+
+    class MockEcomHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            if random.random() < failure_rate:
+                self.send_error(503, "Falha simulada")
+                return
+
+            query = parse_qs(urlparse(self.path).query)
+            try:
+                page = int(query.get('page', ['1'])[0])
+                limit = int(query.get('limit', [str(DEFAULT_LIMIT)])[0])
+            except ValueError:
+                self.send_error(400, "Parâmetros de paginação inválidos")
+                return
+            created_after = query.get('createdAfter', [None])[0]
+
+            body = json.dumps(paginate(docs, page, limit, created_after)).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Silencia o log por requisição para não poluir as medições de throughput
+            pass
+
+    return MockEcomHandler
+
+def start_mock_server(host=HOST, port=PORT, total_docs=TOTAL_DOCS, latency=LATENCY, failure_rate=FAILURE_RATE):
+    """Inicia o servidor em uma thread de fundo e retorna (server, url). Use `server.shutdown()` para parar."""
+    handler = make_handler(generate_docs(total_docs), latency, failure_rate)
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://{host}:{server.server_address[1]}/orders"
+    return server, url
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer((HOST, PORT), make_handler(generate_docs()))
+    print(f"API de pedidos simulada em http://{HOST}:{PORT}/orders ({TOTAL_DOCS} pedidos)")
+    server.serve_forever()
@@ -1,19 +1,23 @@
 import pandas as pd
 import json
 from datetime import datetime
+from partitioning import read_partitions
 
 # Definindo os caminhos dos arquivos
-DATA_FILE = "/home/ubuntu/final_dataset.csv"
+DATA_DIR = "/home/ubuntu/final_dataset"
 KPI_FILE = "/home/ubuntu/kpis.json"
 OUTPUT_FILE = "/home/ubuntu/relatorio_insights.md"
 
-def generate_insights_report():
+# Filtro de período (formato 'AAAA-MM-DD', inclusivo); None = todo o histórico
+START_DATE = None
+END_DATE = None
+
+def generate_insights_report(start_date=START_DATE, end_date=END_DATE):
     """Gera um relatório de insights e análises estratégicas."""
     print("Iniciando a geração do relatório de insights...")
     
-    # Carregar dados e KPIs
-    df = pd.read_csv(DATA_FILE)
-    df['order_date'] = pd.to_datetime(df['order_date'], format='mixed', utc=True).dt.tz_convert(None)
+    # Carregar dados (apenas as partições do período) e KPIs
+    df = read_partitions(DATA_DIR, start_date, end_date)
     
     with open(KPI_FILE, 'r', encoding='utf-8') as f:
         kpis = json.load(f)
@@ -42,7 +46,7 @@ def generate_insights_report():
     | Requisito | Solução Proposta | Vantagens |
     | :--- | :--- | :--- |
     | **Sustentação** (Manutenção de Dados) | Scripts de ETL (Extração, Transformação e Carga) em Python. | A lógica de limpeza e integração está centralizada nos scripts `data_integration.py` e `data_modeling.py`. Isso permite a **automação** do processo via *cron jobs* ou ferramentas de orquestração (como Apache Airflow), garantindo que o dashboard seja atualizado com novos dados de forma regular e confiável. |
-    | **Escalabilidade** (Adição de Indicadores) | Modelo de dados unificado e modular. | O *dataset* final (`final_dataset.csv`) é a única fonte de verdade. Novos indicadores podem ser facilmente adicionados ao script `kpi_calculation.py` ou diretamente no Dash, sem a necessidade de reestruturar a base de dados. A arquitetura em camadas (Dados Brutos -> Dados Integrados -> KPIs -> Dashboard) facilita a manutenção e a expansão. |
+    | **Escalabilidade** (Adição de Indicadores) | Modelo de dados unificado e modular. | O *dataset* final (`final_dataset/`, particionado por ano/mês) é a única fonte de verdade. Novos indicadores podem ser facilmente adicionados ao script `kpi_calculation.py` ou diretamente no Dash, sem a necessidade de reestruturar a base de dados. A arquitetura em camadas (Dados Brutos -> Dados Integrados -> KPIs -> Dashboard) facilita a manutenção e a expansão. |
     """
     
     # --- Análise de Indicadores e Insights ---
@@ -1,21 +1,25 @@
 import pandas as pd
 import json
+from partitioning import read_partitions
 
-# Definindo o caminho do arquivo final
-INPUT_FILE = "upload/final_dataset.csv"
+# Definindo o caminho do dataset final (particionado por ano/mês)
+INPUT_DIR = "upload/final_dataset"
 OUTPUT_FILE = "upload/kpis.json"
 METADATA_FILE = "upload/metadata.json"
 
-def calculate_kpis():
+# Filtro de período (formato 'AAAA-MM-DD', inclusivo); None = todo o histórico
+START_DATE = None
+END_DATE = None
+
+def calculate_kpis(start_date=START_DATE, end_date=END_DATE, input_dir=INPUT_DIR, output_file=OUTPUT_FILE, metadata_file=METADATA_FILE):
     """Calcula os principais indicadores de negócio (KPIs) para o dashboard."""
     print("Iniciando o cálculo dos KPIs...")
     
-    # Carregar o dataset final
-    df = pd.read_csv(INPUT_FILE)
-    df['order_date'] = pd.to_datetime(df['order_date'], format='mixed', utc=True).dt.tz_convert(None)
+    # Carregar apenas as partições do dataset final que cobrem o período
+    df = read_partitions(input_dir, start_date, end_date)
     
     # Carregar metadados para obter o período de análise
-    with open(METADATA_FILE, 'r') as f:
+    with open(metadata_file, 'r') as f:
         metadata = json.load(f)
     
     # --- KPIs Globais ---
@@ -73,8 +77,8 @@ def calculate_kpis():
     # --- Estrutura de Dados para o Dashboard ---
     
     kpis = {
-        "period_start": metadata.get("min_order_date"),
-        "period_end": metadata.get("max_order_date"),
+        "period_start": start_date or metadata.get("min_order_date"),
+        "period_end": end_date or metadata.get("max_order_date"),
         "global_kpis": {
             "total_revenue": total_revenue,
             "total_orders": total_orders,
@@ -100,10 +104,10 @@ def calculate_kpis():
     }
     
     # Salvar os KPIs em um arquivo JSON
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+    with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(kpis, f, indent=4)
         
-    print(f"KPIs calculados e salvos em: {OUTPUT_FILE}")
+    print(f"KPIs calculados e salvos em: {output_file}")
 
 if __name__ == "__main__":
     calculate_kpis()
@@ -0,0 +1,179 @@
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime
+
+from data_integration import integrate_data
+from data_modeling import refine_data_model
+from kpi_calculation import calculate_kpis
+
+try:
+    import resource  # Só existe em sistemas Unix
+except ImportError:
+    resource = None
+
+# Executa a cadeia integração -> modelagem -> KPIs para várias marcas (tenants).
+# Cada tenant é uma pasta com o mesmo layout de `upload/` (clientes_crm.csv,
+# pedido_erp.csv, pedido_ecom.json); as saídas são gravadas na própria pasta.
+SUMMARY_FILE = "run_summary.json"
+LOG_FILE = "run.log"
+MAX_WORKERS = os.cpu_count() or 1
+
+# Estimativa de pico de memória: bytes em disco multiplicados pelo fator de expansão
+# do pandas (strings viram objetos Python; o JSON ainda é carregado inteiro antes do DataFrame)
+CSV_MEMORY_FACTOR = 10
+JSON_MEMORY_FACTOR = 6
+BASE_MEMORY_MB = 150  # Interpretador + pandas importado em cada processo
+MEMORY_BUDGET_FRACTION = 0.7  # Fração da RAM total que o pool pode ocupar
+
+INPUT_FILES = {
+    'crm_file': "clientes_crm.csv",
+    'erp_file': "pedido_erp.csv",
+    'ecom_file': "pedido_ecom.json",
+}
+
+# --- Estimativa de Memória ---
+
+def estimate_peak_memory_mb(tenant_dir):
+    """Estima o pico de memória (MB) do pipeline de um tenant a partir do tamanho das entradas."""
+    total = 0
+    for file_name in INPUT_FILES.values():
+        path = os.path.join(tenant_dir, file_name)
+        if os.path.exists(path):
+            factor = JSON_MEMORY_FACTOR if file_name.endswith('.json') else CSV_MEMORY_FACTOR
+            total += os.path.getsize(path) * factor
+    return BASE_MEMORY_MB + total / 1024 ** 2
+
+def peak_rss_mb():
+    """Pico de memória residente do processo atual (MB), ou None se a plataforma não informar (Windows)."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em bytes no macOS e em KB no Linux
+    return round(max_rss / 1024 ** 2 if sys.platform == 'darwin' else max_rss / 1024, 1)
+
+def default_memory_budget_mb():
+    """Orçamento de memória padrão: uma fração da RAM física da máquina."""
+    try:
+        total_bytes = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return 4096
+    return total_bytes / 1024 ** 2 * MEMORY_BUDGET_FRACTION
+
+# --- Execução de um Tenant (processo isolado) ---
+
+def run_tenant(tenant_dir):
+    """Roda a cadeia completa para um tenant e retorna o resumo da execução.
+
+    Executado em um processo próprio do pool: erros ficam restritos ao tenant e a
+    saída dos scripts (stdout, stderr e warnings) vai para o `run.log` da pasta do tenant.
+    """
+    start = time.perf_counter()
+    result = {'tenant': os.path.basename(os.path.normpath(tenant_dir)), 'tenant_dir': tenant_dir}
+    paths = {key: os.path.join(tenant_dir, name) for key, name in INPUT_FILES.items()}
+    integrated_file = os.path.join(tenant_dir, "integrated_data.csv")
+    dataset_dir = os.path.join(tenant_dir, "final_dataset")
+    metadata_file = os.path.join(tenant_dir, "metadata.json")
+    kpi_file = os.path.join(tenant_dir, "kpis.json")
+
+    try:
+        with open(os.path.join(tenant_dir, LOG_FILE), 'w', encoding='utf-8') as log, redirect_stdout(log), redirect_stderr(log):
+            integrate_data(**paths, output_file=integrated_file, metadata_file=metadata_file,
+                           audit_file=os.path.join(tenant_dir, "dedup_audit.csv"), ecom_api_url=None)
+            refine_data_model(input_file=integrated_file, output_dir=dataset_dir, metadata_file=metadata_file)
+            calculate_kpis(input_dir=dataset_dir, output_file=kpi_file, metadata_file=metadata_file)
+
+        with open(kpi_file, 'r', encoding='utf-8') as f:
+            global_kpis = json.load(f)['global_kpis']
+        result.update(status='ok', total_revenue=global_kpis['total_revenue'], total_orders=global_kpis['total_orders'])
+    except Exception as e:
+        result.update(status='error', error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+
+    result['seconds'] = round(time.perf_counter() - start, 2)
+    # Pico do processo; no Python 3.11+ o processo é exclusivo do tenant
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+# --- Agendamento ---
+
+def run_tenants(tenant_dirs, max_workers=MAX_WORKERS, memory_budget_mb=None, summary_file=SUMMARY_FILE):
+    """Roda vários tenants em um pool de processos, com agendamento consciente de memória.
+
+    Os tenants são ordenados do maior para o menor (pela memória estimada), para que
+    os maiores não fiquem por último. Um tenant só é iniciado se a soma das estimativas
+    em execução couber em `memory_budget_mb`; quando o próximo maior não cabe, o
+    primeiro menor que couber é iniciado no lugar. Um tenant maior que o orçamento
+    roda sozinho.
+    """
+    memory_budget_mb = memory_budget_mb or default_memory_budget_mb()
+    pending = sorted(((estimate_peak_memory_mb(d), d) for d in tenant_dirs), reverse=True)
+    print(f"Rodando {len(pending)} tenants ({max_workers} processos, orçamento de {memory_budget_mb:,.0f} MB)...")
+
+    start = time.perf_counter()
+    results = []
+    running = {}
+    # Um processo novo por tenant: isola memória, estado global e o pico de RSS medido.
+    # `max_tasks_per_child` só existe a partir do Python 3.11; antes disso os processos
+    # são reaproveitados e `peak_rss_mb` passa a ser o pico acumulado do processo
+    pool_options = {'max_tasks_per_child': 1} if sys.version_info >= (3, 11) else {}
+    with ProcessPoolExecutor(max_workers=max_workers, **pool_options) as pool:
+        while pending or running:
+            in_use = sum(estimate for estimate, _ in running.values())
+            while pending and len(running) < max_workers:
+                fits = [i for i, (estimate, _) in enumerate(pending) if in_use + estimate <= memory_budget_mb]
+                if not fits and running:
+                    break
+                estimate, tenant_dir = pending.pop(fits[0] if fits else 0)
+                running[pool.submit(run_tenant, tenant_dir)] = (estimate, tenant_dir)
+                in_use += estimate
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                estimate, tenant_dir = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Falha do próprio processo (ex: morto por falta de memória)
+                    result = {'tenant': os.path.basename(os.path.normpath(tenant_dir)), 'tenant_dir': tenant_dir,
+                              'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+                result['estimated_memory_mb'] = round(estimate, 1)
+                results.append(result)
+                print(f"[{len(results)}/{len(tenant_dirs)}] {result['tenant']}: {result['status']} ({result.get('seconds', '-')}s)")
+
+    failed = [r for r in results if r['status'] != 'ok']
+    summary = {
+        "run_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "total_tenants": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "wall_seconds": round(time.perf_counter() - start, 2),
+        "max_workers": max_workers,
+        "memory_budget_mb": round(memory_budget_mb, 1),
+        "total_revenue": sum(r.get('total_revenue', 0) for r in results),
+        "total_orders": sum(r.get('total_orders', 0) for r in results),
+        "tenants": sorted(results, key=lambda r: r['tenant']),
+    }
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=4, ensure_ascii=False)
+
+    print(f"Resumo consolidado salvo em: {summary_file} ({summary['succeeded']} ok, {summary['failed']} com erro, {summary['wall_seconds']}s)")
+    return summary
+
+if __name__ == "__main__":
+    # `python multi_tenant_runner.py tenants/marca_a tenants/marca_b ... [--workers N] [--memory-budget-mb MB]`
+    args = sys.argv[1:]
+    options = {}
+    for flag in ("--workers", "--memory-budget-mb"):
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = float(args[i + 1])
+            del args[i:i + 2]
+    run_tenants(
+        args,
+        max_workers=int(options.get("--workers", MAX_WORKERS)),
+        memory_budget_mb=options.get("--memory-budget-mb"),
+    )
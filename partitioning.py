@@ -0,0 +1,138 @@
+import pandas as pd
+import json
+import os
+
+# Layout do dataset particionado:
+#   <raiz>/order_year=2024/order_month=05[/sales_channel=Online]/part.csv
+#   <raiz>/_manifest.json  -> colunas de partição + estatísticas min/max de cada partição
+MANIFEST_NAME = "_manifest.json"
+PART_FILE = "part.csv"
+NULL_PARTITION = "null"
+
+# --- Escrita ---
+
+def _partition_value(value):
+    """Normaliza o valor de uma chave de partição (inteiros sem '.0', nulos como 'null')."""
+    if pd.isna(value):
+        return NULL_PARTITION
+    if hasattr(value, 'item'):
+        value = value.item()  # Tipos numpy -> tipos nativos (serializáveis em JSON)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def partition_key(values, partition_cols):
+    """Monta o caminho relativo da partição (ex: 'order_year=2024/order_month=05')."""
+    parts = []
+    for col, value in zip(partition_cols, values):
+        value = _partition_value(value)
+        if col == 'order_month' and value != NULL_PARTITION:
+            value = f"{int(value):02d}"
+        parts.append(f"{col}={value}")
+    return "/".join(parts)
+
+def load_manifest(root):
+    """Carrega o manifesto do dataset particionado (vazio se ainda não existir)."""
+    manifest_path = os.path.join(root, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {"partition_cols": [], "partitions": {}}
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def write_partitions(df, root, partition_cols, only=None):
+    """Grava `df` particionado por `partition_cols` e atualiza o manifesto com estatísticas min/max.
+
+    Se `only` for informado (lista de (ano, mês)), apenas essas partições são regravadas;
+    as demais entradas do manifesto são mantidas. Caso contrário, o dataset é regravado
+    por inteiro e partições que deixaram de existir são removidas.
+    """
+    os.makedirs(root, exist_ok=True)
+    manifest = load_manifest(root)
+    if only is not None and manifest["partitions"] and manifest["partition_cols"] != partition_cols:
+        raise ValueError(f"Colunas de partição {partition_cols} diferem do manifesto existente {manifest['partition_cols']}.")
+
+    partitions = dict(manifest["partitions"]) if only is not None else {}
+    if only is not None:
+        only = {(int(year), int(month)) for year, month in only}
+        # Descarta as entradas antigas das partições recalculadas (podem ter sumido)
+        partitions = {key: entry for key, entry in partitions.items()
+                      if (entry["values"].get("order_year"), entry["values"].get("order_month")) not in only}
+
+    for values, df_part in df.groupby(partition_cols, dropna=False):
+        values = values if isinstance(values, tuple) else (values,)
+        values = [_partition_value(v) for v in values]
+        entry_values = dict(zip(partition_cols, values))
+        if only is not None and (entry_values.get("order_year"), entry_values.get("order_month")) not in only:
+            continue
+
+        key = partition_key(values, partition_cols)
+        part_dir = os.path.join(root, *key.split("/"))
+        os.makedirs(part_dir, exist_ok=True)
+        df_part.to_csv(os.path.join(part_dir, PART_FILE), index=False, encoding='utf-8')
+
+        order_dates = df_part['order_date'].dropna()
+        partitions[key] = {
+            "path": f"{key}/{PART_FILE}",
+            "values": entry_values,
+            "rows": len(df_part),
+            "min_order_date": order_dates.min().strftime('%Y-%m-%d %H:%M:%S') if not order_dates.empty else None,
+            "max_order_date": order_dates.max().strftime('%Y-%m-%d %H:%M:%S') if not order_dates.empty else None,
+            "min_total_value": float(df_part['total_value'].min()) if df_part['total_value'].notna().any() else None,
+            "max_total_value": float(df_part['total_value'].max()) if df_part['total_value'].notna().any() else None,
+        }
+
+    # Remove arquivos de partições que não fazem mais parte do dataset
+    for key, entry in manifest["partitions"].items():
+        if key not in partitions:
+            stale_file = os.path.join(root, *entry["path"].split("/"))
+            if os.path.exists(stale_file):
+                os.remove(stale_file)
+
+    manifest = {"partition_cols": partition_cols, "partitions": dict(sorted(partitions.items()))}
+    with open(os.path.join(root, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=4, ensure_ascii=False)
+    return manifest
+
+# --- Leitura com Poda de Partições ---
+
+def prune_partitions(manifest, start_date=None, end_date=None, sales_channel=None):
+    """Retorna as entradas do manifesto cujo intervalo min/max de datas cruza o filtro."""
+    start = pd.Timestamp(start_date) if start_date else None
+    # `end_date` é inclusivo: considera o dia inteiro
+    end = pd.Timestamp(end_date) + pd.Timedelta(days=1) if end_date else None
+
+    selected = []
+    for entry in manifest["partitions"].values():
+        channel = entry["values"].get("sales_channel")
+        if sales_channel and channel is not None and channel != sales_channel:
+            continue
+        if start is not None or end is not None:
+            if entry["min_order_date"] is None:
+                continue
+            if start is not None and pd.Timestamp(entry["max_order_date"]) < start:
+                continue
+            if end is not None and pd.Timestamp(entry["min_order_date"]) >= end:
+                continue
+        selected.append(entry)
+    return selected
+
+def read_partitions(root, start_date=None, end_date=None, sales_channel=None):
+    """Lê apenas as partições que atendem ao filtro de datas/canal e aplica o filtro exato nas linhas."""
+    manifest = load_manifest(root)
+    entries = prune_partitions(manifest, start_date, end_date, sales_channel)
+    print(f"Lendo {len(entries)} de {len(manifest['partitions'])} partições de {root}...")
+
+    frames = [pd.read_csv(os.path.join(root, *entry["path"].split("/"))) for entry in entries]
+    if not frames:
+        raise ValueError(f"Nenhuma partição de {root} atende ao filtro ({start_date} a {end_date}).")
+    df = pd.concat(frames, ignore_index=True)
+    df['order_date'] = pd.to_datetime(df['order_date'], format='mixed', utc=True).dt.tz_convert(None)
+
+    # As partições podem cobrir parte do período além do filtro: filtrar as linhas
+    if start_date:
+        df = df[df['order_date'] >= pd.Timestamp(start_date)]
+    if end_date:
+        df = df[df['order_date'] < pd.Timestamp(end_date) + pd.Timedelta(days=1)]
+    if sales_channel:
+        df = df[df['sales_channel'] == sales_channel]
+    return df.reset_index(drop=True)
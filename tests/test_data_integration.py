@@ -0,0 +1,87 @@
+import pandas as pd
+
+from data_integration import find_cross_source_duplicates
+
+
+def _order(order_id, source, order_date, document='12345678901', total_value=100.0):
+    return {'order_id': order_id, 'customer_document': document, 'seller_name': 'KELI',
+            'total_value': total_value, 'order_date': pd.Timestamp(order_date), 'source': source}
+
+
+def test_repeat_purchases_are_paired_one_to_one():
+    # Mesmo cliente, quatro pedidos de R$ 100: o melhor candidato de B (X) fica com A,
+    # e B ainda deve casar com Y (180 min de distância, dentro da janela)
+    t = pd.Timestamp('2024-03-01 10:00')
+    df_orders = pd.DataFrame([
+        _order('A', 'ERP_Fisica', t),
+        _order('B', 'ERP_Fisica', t + pd.Timedelta(hours=2)),
+        _order('X', 'Vestishop', t + pd.Timedelta(minutes=30)),
+        _order('Y', 'Vestishop', t + pd.Timedelta(hours=5)),
+    ])
+
+    audit = find_cross_source_duplicates(df_orders)
+
+    pairs = set(zip(audit['order_id_erp'], audit['order_id_ecom']))
+    assert pairs == {('A', 'X'), ('B', 'Y')}
+
+
+def test_orders_outside_tolerances_are_not_paired():
+    t = pd.Timestamp('2024-03-01 10:00')
+    df_orders = pd.DataFrame([
+        _order('A', 'ERP_Fisica', t),
+        _order('X', 'Vestishop', t + pd.Timedelta(days=4)),
+        _order('B', 'ERP_Fisica', t, total_value=250.0),
+        _order('Y', 'Vestishop', t, total_value=251.0),
+        _order('C', 'ERP_Fisica', t, document='98765432100'),
+    ])
+
+    assert find_cross_source_duplicates(df_orders).empty
+
+
+def test_value_tolerance_wider_than_one_real():
+    t = pd.Timestamp('2024-03-01 10:00')
+    df_orders = pd.DataFrame([
+        _order('A', 'ERP_Fisica', t, total_value=100.00),
+        _order('X', 'Vestishop', t, total_value=101.50),
+        _order('B', 'ERP_Fisica', t, document='98765432100', total_value=100.00),
+        _order('Y', 'Vestishop', t, document='98765432100', total_value=102.01),
+    ])
+
+    audit = find_cross_source_duplicates(df_orders, value_tolerance=2.0)
+
+    # Diferença de R$ 1,50 (dentro da tolerância) casa; R$ 2,01 não
+    assert set(zip(audit['order_id_erp'], audit['order_id_ecom'])) == {('A', 'X')}
+
+
+def test_value_tolerance_boundary_is_inclusive():
+    t = pd.Timestamp('2024-03-01 10:00')
+    df_orders = pd.DataFrame([
+        _order('A', 'ERP_Fisica', t, total_value=99.99),
+        _order('X', 'Vestishop', t, total_value=100.04),
+        _order('B', 'ERP_Fisica', t, document='98765432100', total_value=99.99),
+        _order('Y', 'Vestishop', t, document='98765432100', total_value=100.05),
+    ])
+
+    audit = find_cross_source_duplicates(df_orders, value_tolerance=0.05)
+
+    assert set(zip(audit['order_id_erp'], audit['order_id_ecom'])) == {('A', 'X')}
+
+
+def test_oversized_blocks_fall_back_to_nearest_time():
+    # Documento genérico com várias vendas de mesmo valor no mesmo dia
+    t = pd.Timestamp('2024-03-01 10:00')
+    orders = []
+    for hour in range(6):
+        orders.append(_order(f'E{hour}', 'ERP_Fisica', t + pd.Timedelta(hours=hour), document='00000000000'))
+        orders.append(_order(f'W{hour}', 'Vestishop', t + pd.Timedelta(hours=hour, minutes=10), document='00000000000'))
+    orders.append(_order('A', 'ERP_Fisica', t))
+    orders.append(_order('X', 'Vestishop', t + pd.Timedelta(minutes=30)))
+    df_orders = pd.DataFrame(orders)
+
+    audit = find_cross_source_duplicates(df_orders, max_block_size=3)
+
+    pairs = set(zip(audit['order_id_erp'], audit['order_id_ecom']))
+    assert pairs == {(f'E{hour}', f'W{hour}') for hour in range(6)} | {('A', 'X')}
+    methods = dict(zip(audit['order_id_erp'], audit['match_method']))
+    assert methods['A'] == 'block'
+    assert methods['E0'] == 'nearest_time'
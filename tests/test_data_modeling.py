@@ -0,0 +1,77 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from data_modeling import refine_data_model
+from partitioning import load_manifest, read_partitions
+
+
+def _order(order_id, document, order_date, total_value=100.0):
+    return {'order_id': order_id, 'customer_document': document, 'seller_name': 'KELI',
+            'total_value': total_value, 'order_date': order_date, 'source': 'ERP_Fisica',
+            'status': 'active'}
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    input_file = tmp_path / "integrated_data.csv"
+    metadata_file = tmp_path / "metadata.json"
+    output_dir = tmp_path / "final_dataset"
+    metadata_file.write_text(json.dumps({}), encoding='utf-8')
+
+    def run(orders, partitions=None):
+        pd.DataFrame(orders).to_csv(input_file, index=False)
+        refine_data_model(partitions=partitions, input_file=str(input_file),
+                          output_dir=str(output_dir), metadata_file=str(metadata_file))
+        return str(output_dir)
+
+    return run
+
+
+def _part_mtimes(output_dir):
+    manifest = load_manifest(output_dir)
+    return {key: os.stat(os.path.join(output_dir, *entry["path"].split("/"))).st_mtime_ns
+            for key, entry in manifest["partitions"].items()}
+
+
+def test_late_first_purchase_rewrites_later_months(dataset):
+    orders = [
+        _order('o1', '11111111111', '2023-03-10 10:00:00'),
+        _order('o2', '11111111111', '2023-05-10 10:00:00'),
+        _order('o3', '22222222222', '2023-04-10 10:00:00'),
+    ]
+    output_dir = dataset(orders)
+    before = _part_mtimes(output_dir)
+
+    # Pedido atrasado de janeiro antecipa a primeira compra do cliente 111...
+    output_dir = dataset(orders + [_order('o4', '11111111111', '2023-01-10 10:00:00')], partitions=[(2023, 1)])
+
+    df = read_partitions(output_dir).set_index('order_id')
+    assert df.loc['o4', 'is_first_purchase']
+    assert not df.loc['o1', 'is_first_purchase']
+    assert not df.loc['o2', 'is_first_purchase']
+    assert (pd.to_datetime(df.loc[['o1', 'o2', 'o4'], 'first_order_date']) == pd.Timestamp('2023-01-10 10:00:00')).all()
+    # O cliente 222... não mudou: o mês dele não é regravado
+    after = _part_mtimes(output_dir)
+    assert after['order_year=2023/order_month=04'] == before['order_year=2023/order_month=04']
+
+
+def test_read_partitions_prunes_by_date(dataset, capsys):
+    output_dir = dataset([
+        _order('o1', '11111111111', '2023-01-10 10:00:00'),
+        _order('o2', '22222222222', '2023-02-10 10:00:00'),
+        _order('o3', '33333333333', '2023-03-31 23:00:00'),
+        _order('o4', '44444444444', '2023-04-01 09:00:00'),
+    ])
+    capsys.readouterr()
+
+    df = read_partitions(output_dir, start_date='2023-02-01', end_date='2023-03-31')
+
+    assert "Lendo 2 de 4 partições" in capsys.readouterr().out
+    # `end_date` é inclusivo (o dia inteiro)
+    assert sorted(df['order_id']) == ['o2', 'o3']
+
+    with pytest.raises(ValueError):
+        read_partitions(output_dir, start_date='2024-01-01')
@@ -0,0 +1,49 @@
+import threading
+import time
+
+import pytest
+
+from ecom_extractor import iter_ecom_docs
+from ecom_mock_server import start_mock_server
+
+
+@pytest.fixture
+def mock_url():
+    server, url = start_mock_server(port=0, total_docs=500, latency=0.01, failure_rate=0)
+    try:
+        yield url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _wait_producer_finished(timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not any(t.name == "ecom-extractor" for t in threading.enumerate()):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_reads_every_page(mock_url):
+    docs = list(iter_ecom_docs(mock_url, limit=10, max_concurrency=4))
+
+    assert len(docs) == 500
+    assert len({doc['_id'] for doc in docs}) == 500
+
+
+def test_closing_early_stops_the_background_thread(mock_url):
+    docs = iter_ecom_docs(mock_url, limit=10, max_concurrency=2)
+    next(docs)
+    docs.close()
+
+    assert _wait_producer_finished()
+
+
+def test_consumer_error_stops_the_background_thread(mock_url):
+    with pytest.raises(RuntimeError):
+        for _ in iter_ecom_docs(mock_url, limit=10, max_concurrency=2):
+            raise RuntimeError("falha no processamento")
+
+    assert _wait_producer_finished()